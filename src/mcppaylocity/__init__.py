@@ -5,16 +5,17 @@ This module provides a Model Context Protocol (MCP) server for accessing Payloci
 It exposes Paylocity resources and tools through the MCP interface.
 """
 
-from typing import Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 import os
-import json
+import asyncio
 import sys
 import logging
-import time
-from dotenv import load_dotenv
-from mcp.server.fastmcp import FastMCP
-from mcp.types import ModelHint, ModelPreferences
-from .paylocity_client import PaylocityClient
+from .config import Config
+from .constants import INSTRUCTIONS, JSON_MIME_TYPE, PAYLOCITY_SCHEME, SERVER_VERSION
+from . import json_codec
+
+if TYPE_CHECKING:
+    from mcp.types import ModelPreferences
 
 # Configure logging
 logging.basicConfig(
@@ -24,17 +25,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger('mcppaylocity')
 
-# Register custom URI scheme for paylocity resources
-PAYLOCITY_SCHEME = "paylocity"
+# Resource URI templates, built once at import time
+_URI_EMPLOYEES = "{}://employees/{{company_id}}".format(PAYLOCITY_SCHEME)
+_URI_EMPLOYEE = "{}://employees/{{company_id}}/{{employee_id}}".format(PAYLOCITY_SCHEME)
+_URI_EARNINGS = "{}://earnings/{{company_id}}/{{employee_id}}".format(PAYLOCITY_SCHEME)
+_URI_CODES = "{}://codes/{{company_id}}/{{code_resource}}".format(PAYLOCITY_SCHEME)
+_URI_LOCAL_TAXES = "{}://localtaxes/{{company_id}}/{{employee_id}}".format(PAYLOCITY_SCHEME)
+_URI_PAYSTATEMENT = "{}://paystatement/{{company_id}}/{{employee_id}}/{{year}}/{{check_date}}".format(PAYLOCITY_SCHEME)
 
-# Default instructions presented in the MCP handshake
-INSTRUCTIONS = (
-    "This server exposes Paylocity resources and tools. "
-    "Use the provided resources to fetch employee, payroll and code data."
-)
+def _build_model_prefs() -> "ModelPreferences | None":
+    """
+    Build model preferences from the optional MODEL_* environment variables.
+    Returns None when none of them are set.
+    """
+    cost_pref = os.getenv("MODEL_COST_PRIORITY")
+    speed_pref = os.getenv("MODEL_SPEED_PRIORITY")
+    intel_pref = os.getenv("MODEL_INTELLIGENCE_PRIORITY")
+    hints_pref = os.getenv("MODEL_HINTS")
 
-# Package version used in the handshake
-SERVER_VERSION = "0.1.0"
+    if not any([cost_pref, speed_pref, intel_pref, hints_pref]):
+        return None
+
+    from mcp.types import ModelHint, ModelPreferences
+
+    hints: list[ModelHint] | None = None
+    if hints_pref:
+        hints = [ModelHint(name=h.strip()) for h in hints_pref.split(',') if h.strip()]
+
+    return ModelPreferences(
+        hints=hints,
+        costPriority=float(cost_pref) if cost_pref else None,
+        speedPriority=float(speed_pref) if speed_pref else None,
+        intelligencePriority=float(intel_pref) if intel_pref else None,
+    )
 
 def main():
     """
@@ -43,45 +66,26 @@ def main():
     """
     try:
         logger.info("Starting Paylocity MCP server...")
-        # Load environment variables from .env file
-        load_dotenv()
-        logger.info("Loaded environment variables")
+        # Load environment variables from .env file, unless the environment
+        # has already been populated (e.g. by the container or MCP host)
+        if not os.environ.get("PAYLOCITY_CLIENT_ID"):
+            from dotenv import load_dotenv
+            load_dotenv()
+            logger.info("Loaded environment variables")
         
         # Get configuration from environment variables
-        client_id = os.getenv("PAYLOCITY_CLIENT_ID")
-        client_secret = os.getenv("PAYLOCITY_CLIENT_SECRET")
-        environment = os.getenv("PAYLOCITY_ENVIRONMENT", "production")
+        config = Config.from_env()
 
         # Optional model preference settings
-        cost_pref = os.getenv("MODEL_COST_PRIORITY")
-        speed_pref = os.getenv("MODEL_SPEED_PRIORITY")
-        intel_pref = os.getenv("MODEL_INTELLIGENCE_PRIORITY")
-        hints_pref = os.getenv("MODEL_HINTS")
-
-        model_prefs: ModelPreferences | None = None
-        if any([cost_pref, speed_pref, intel_pref, hints_pref]):
-            hints: list[ModelHint] | None = None
-            if hints_pref:
-                hints = [ModelHint(name=h.strip()) for h in hints_pref.split(',') if h.strip()]
-
-            model_prefs = ModelPreferences(
-                hints=hints,
-                costPriority=float(cost_pref) if cost_pref else None,
-                speedPriority=float(speed_pref) if speed_pref else None,
-                intelligencePriority=float(intel_pref) if intel_pref else None,
-            )
-        
-        # Get company IDs
-        company_ids_str = os.getenv("PAYLOCITY_COMPANY_IDS", "")
-        company_ids = [id.strip() for id in company_ids_str.split(",") if id.strip()]
+        model_prefs = _build_model_prefs()
         
         # Validate required environment variables
         missing_vars = []
-        if not client_id:
+        if not config.client_id:
             missing_vars.append("PAYLOCITY_CLIENT_ID")
-        if not client_secret:
+        if not config.client_secret:
             missing_vars.append("PAYLOCITY_CLIENT_SECRET")
-        if not company_ids:
+        if not config.company_ids:
             missing_vars.append("PAYLOCITY_COMPANY_IDS")
             
         if missing_vars:
@@ -89,8 +93,14 @@ def main():
             logger.error(error_msg)
             raise ValueError(error_msg)
         
-        logger.info("Environment: %s", environment)
-        logger.info("Company IDs: %s", company_ids)
+        logger.info("Environment: %s", config.environment)
+        logger.info("Company IDs: %s", list(config.company_ids))
+        
+        # Import the heavy server and HTTP stacks only once the configuration is
+        # known to be usable, so importing the package (or any of its
+        # submodules) stays cheap
+        from mcp.server.fastmcp import FastMCP
+        from .paylocity_client import PaylocityClient
         
         # Create FastMCP instance with handshake metadata
         mcp = FastMCP("Paylocity", instructions=INSTRUCTIONS)
@@ -101,148 +111,195 @@ def main():
         else:
             logger.info("No model preferences configured")
         
-        # Configure WebSocket settings
-        # Note: FastMCP handles WebSocket transport automatically
-        # We just need to set the appropriate parameters
-        
         # Initialize Paylocity client
-        client = PaylocityClient(client_id, client_secret, environment)
+        client = PaylocityClient(
+            config.client_id,
+            config.client_secret,
+            config.environment,
+            max_inflight=config.max_inflight,
+            token_info=config.token_info
+        )
         
         # Register resources
-        register_resources(mcp, client, company_ids)
+        register_resources(mcp, client, config)
         
         # Register tools
-        register_tools(mcp, client, company_ids)
+        register_tools(mcp, client, config)
         
-        logger.info("Starting server with WebSocket transport...")
+        logger.info("Starting server with %s transport...", config.transport)
         # Run the server
-        mcp.run()
+        run_server(mcp, config)
     except Exception as e:
         logger.error("Error starting server: %s", str(e), exc_info=True)
         raise
 
-def register_resources(mcp, client, company_ids):
+def _to_id(value, default=None):
+    """Coerce an ID argument to a string, substituting default when it is missing"""
+    if value is None:
+        return default
+    return value if type(value) is str else str(value)
+
+def _bind_unix_socket(path):
+    """
+    Bind a Unix domain socket that only the current user can connect to.
+    
+    uvicorn's own uds= binding makes the socket world-writable (0o666), so the
+    socket is created here under a restrictive umask and handed over by fd.
+    """
+    import socket
+    import stat
+    
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.stat(directory)
+    # Anyone who owns the directory can swap the socket out from under us; only our
+    # own directories and root-owned sticky ones (such as /tmp) are safe
+    if not (st.st_uid == os.getuid() or (st.st_uid == 0 and st.st_mode & stat.S_ISVTX)):
+        raise RuntimeError("Refusing to create a socket in {}: directory is owned by another user".format(directory))
+    
+    # Remove a stale socket left by a previous run, but never anything else
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        pass
+    else:
+        if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+            raise RuntimeError("Refusing to replace {}: not a socket owned by this user".format(path))
+        os.remove(path)
+    
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        sock.bind(path)
+    except OSError:
+        sock.close()
+        raise
+    finally:
+        os.umask(old_umask)
+    os.chmod(path, 0o600)
+    return sock
+
+def run_server(mcp, config):
+    """
+    Run the MCP server on the transport selected by the configuration.
+    
+    Args:
+        mcp: The FastMCP server instance
+        config: The server Config
+    
+    The "uds" transport serves the streamable HTTP app on a Unix domain socket,
+    which avoids the TCP stack when the client runs on the same host. The socket
+    is only accessible to the user running the server.
+    """
+    if config.transport == "uds":
+        import uvicorn
+        from mcp.server.transport_security import TransportSecuritySettings
+        
+        # Host-header checks guard against DNS rebinding from browsers,
+        # which cannot reach a Unix domain socket; access is controlled by
+        # the socket's file permissions instead
+        mcp.settings.transport_security = TransportSecuritySettings(enable_dns_rebinding_protection=False)
+        socket_path = config.socket_path
+        sock = _bind_unix_socket(socket_path)
+        try:
+            logger.info("Listening on Unix domain socket %s", socket_path)
+            uvicorn.run(mcp.streamable_http_app(), fd=sock.fileno(), log_level="warning")
+        finally:
+            sock.close()
+            try:
+                os.remove(socket_path)
+            except OSError:
+                pass
+    else:
+        mcp.run(transport=config.transport)
+
+def register_resources(mcp, client, config):
     """
     Register all Paylocity resources with the MCP server.
     
     Args:
         mcp: The FastMCP server instance
         client: The PaylocityClient instance
-        company_ids: List of company IDs to use
+        config: The server Config; its first company ID is the default
+    
+    Resources return their payload pre-serialized as compact JSON, so FastMCP
+    passes it through instead of re-encoding it. Like the tools, they run the
+    blocking client in a worker thread so a slow read never stalls the event loop.
+    URI template parameters always arrive as strings, so no coercion is needed.
     """
-    @mcp.resource("{}://employees/{{company_id}}".format(PAYLOCITY_SCHEME))
-    def get_employees(company_id: Optional[Union[str, int]] = None) -> Dict[str, Any]:
+    default_company = config.default_company_id
+    
+    @mcp.resource(_URI_EMPLOYEES, mime_type=JSON_MIME_TYPE)
+    async def get_employees(company_id: str | None = None) -> str:
         """Get all employees for a company."""
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
+        company_id_str = company_id or default_company
         logger.info("Getting employees for company_id=%s", company_id_str)
-        
-        # Implement retry logic for handling timeouts
-        max_retries = 3
-        retry_delay = 1  # seconds
-        
-        for attempt in range(max_retries):
-            try:
-                return client.get_all_employees(company_id_str)
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning("Attempt %d failed: %s. Retrying in %d seconds...", attempt+1, str(e), retry_delay)
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    logger.error("Failed after %d attempts: %s", max_retries, str(e))
-                    raise
+        return json_codec.dumps(await asyncio.to_thread(client.get_all_employees, company_id_str))
     
-    @mcp.resource("{}://employees/{{company_id}}/{{employee_id}}".format(PAYLOCITY_SCHEME))
-    def get_employee_details(company_id: Optional[Union[str, int]] = None, employee_id: Optional[Union[str, int]] = None) -> Dict[str, Any]:
+    @mcp.resource(_URI_EMPLOYEE, mime_type=JSON_MIME_TYPE)
+    async def get_employee_details(company_id: str | None = None, employee_id: str | None = None) -> str:
         """Get details for a specific employee."""
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        employee_id_str = str(employee_id)
-        print("Getting employee details for company_id={}, employee_id={}".format(company_id_str, employee_id_str), file=sys.stderr)
-        return client.get_employee_details(company_id_str, employee_id_str)
+        company_id_str = company_id or default_company
+        logger.info("Getting employee details for company_id=%s, employee_id=%s", company_id_str, employee_id)
+        return json_codec.dumps(await asyncio.to_thread(client.get_employee_details, company_id_str, employee_id))
     
-    @mcp.resource("{}://earnings/{{company_id}}/{{employee_id}}".format(PAYLOCITY_SCHEME))
-    def get_earnings(company_id: Optional[Union[str, int]] = None, employee_id: Optional[Union[str, int]] = None) -> Dict[str, Any]:
+    @mcp.resource(_URI_EARNINGS, mime_type=JSON_MIME_TYPE)
+    async def get_earnings(company_id: str | None = None, employee_id: str | None = None) -> str:
         """Get earnings data for a specific employee."""
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        employee_id_str = str(employee_id)
-        print("Getting earnings for company_id={}, employee_id={}".format(company_id_str, employee_id_str), file=sys.stderr)
-        return client.get_employee_earnings(company_id_str, employee_id_str)
+        company_id_str = company_id or default_company
+        logger.info("Getting earnings for company_id=%s, employee_id=%s", company_id_str, employee_id)
+        return json_codec.dumps(await asyncio.to_thread(client.get_employee_earnings, company_id_str, employee_id))
     
-    @mcp.resource("{}://codes/{{company_id}}/{{code_resource}}".format(PAYLOCITY_SCHEME))
-    def get_codes(company_id: Optional[Union[str, int]] = None, code_resource: str = None) -> Dict[str, Any]:
+    @mcp.resource(_URI_CODES, mime_type=JSON_MIME_TYPE)
+    async def get_codes(company_id: str | None = None, code_resource: str | None = None) -> str:
         """Get company codes for a specific resource."""
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        print("Getting codes for company_id={}, code_resource={}".format(company_id_str, code_resource), file=sys.stderr)
-        return client.get_company_codes(company_id_str, code_resource)
+        company_id_str = company_id or default_company
+        logger.info("Getting codes for company_id=%s, code_resource=%s", company_id_str, code_resource)
+        return json_codec.dumps(await asyncio.to_thread(client.get_company_codes, company_id_str, code_resource))
 
-    @mcp.resource("{}://localtaxes/{{company_id}}/{{employee_id}}".format(PAYLOCITY_SCHEME))
-    def get_local_taxes(company_id: Optional[Union[str, int]] = None, employee_id: Optional[Union[str, int]] = None) -> Dict[str, Any]:
+    @mcp.resource(_URI_LOCAL_TAXES, mime_type=JSON_MIME_TYPE)
+    async def get_local_taxes(company_id: str | None = None, employee_id: str | None = None) -> str:
         """Get local taxes for a specific employee."""
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        employee_id_str = str(employee_id)
-        print("Getting local taxes for company_id={}, employee_id={}".format(company_id_str, employee_id_str), file=sys.stderr)
-        return client.get_employee_local_taxes(company_id_str, employee_id_str)
+        company_id_str = company_id or default_company
+        logger.info("Getting local taxes for company_id=%s, employee_id=%s", company_id_str, employee_id)
+        return json_codec.dumps(await asyncio.to_thread(client.get_employee_local_taxes, company_id_str, employee_id))
 
-    @mcp.resource("{}://paystatement/{{company_id}}/{{employee_id}}/{{year}}/{{check_date}}".format(PAYLOCITY_SCHEME))
-    def get_paystatement_details(
-        company_id: Optional[Union[str, int]] = None, 
-        employee_id: Optional[Union[str, int]] = None,
-        year: Union[str, int] = None,
-        check_date: str = None
-    ) -> Dict[str, Any]:
+    @mcp.resource(_URI_PAYSTATEMENT, mime_type=JSON_MIME_TYPE)
+    async def get_paystatement_details(
+        company_id: str | None = None, 
+        employee_id: str | None = None,
+        year: str | None = None,
+        check_date: str | None = None
+    ) -> str:
         """Get pay statement details for a specific employee, year and check date."""
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        employee_id_str = str(employee_id)
-        year_str = str(year)
-        print("Getting pay statement details for company_id={}, employee_id={}, year={}, check_date={}".format(company_id_str, employee_id_str, year_str, check_date), file=sys.stderr)
-        return client.get_employee_paystatement_details(company_id_str, employee_id_str, year_str, check_date)
+        company_id_str = company_id or default_company
+        logger.info("Getting pay statement details for company_id=%s, employee_id=%s, year=%s, check_date=%s", company_id_str, employee_id, year, check_date)
+        return json_codec.dumps(await asyncio.to_thread(client.get_employee_paystatement_details, company_id_str, employee_id, year, check_date))
 
-def register_tools(mcp, client, company_ids):
+def register_tools(mcp, client, config):
     """
     Register all Paylocity tools with the MCP server.
     
     Args:
         mcp: The FastMCP server instance
         client: The PaylocityClient instance
-        company_ids: List of company IDs to use
+        config: The server Config; its first company ID is the default
     """
-    # Helper function to create a new Paylocity client (for lazy initialization)
-    def create_paylocity_client():
-        client_id = os.getenv("PAYLOCITY_CLIENT_ID")
-        client_secret = os.getenv("PAYLOCITY_CLIENT_SECRET")
-        environment = os.getenv("PAYLOCITY_ENVIRONMENT", "production")
-        return PaylocityClient(client_id, client_secret, environment)
-    
-    # Helper function for implementing retry logic
-    def with_retry(func, *args, **kwargs):
-        max_retries = 3
-        retry_delay = 1  # seconds
-        
-        for attempt in range(max_retries):
-            try:
-                return func(*args, **kwargs)
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    logger.warning("Attempt %d failed: %s. Retrying in %d seconds...", attempt+1, str(e), retry_delay)
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    logger.error("Failed after %d attempts: %s", max_retries, str(e))
-                    raise
+    default_company = config.default_company_id
     
     @mcp.tool()
-    def fetch_employees(company_id: Optional[Union[str, int]] = None) -> Dict[str, Any]:
+    async def fetch_employees(company_id: Optional[Union[str, int]] = None) -> List[Dict[str, Any]]:
         """
-        Fetch all employees for a company.
+        Fetch all employees for a company, across every page of the employee list.
         
         Args:
             company_id: Optional company ID (string or integer). If not provided, uses the first company ID from configuration.
         """
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        return with_retry(client.get_all_employees, company_id_str)
+        company_id_str = _to_id(company_id, default_company)
+        return await asyncio.to_thread(client.get_all_employees, company_id_str)
     
     @mcp.tool()
-    def fetch_employee_details(company_id: Optional[Union[str, int]] = None, employee_id: Union[str, int] = None) -> Dict[str, Any]:
+    async def fetch_employee_details(company_id: Optional[Union[str, int]] = None, employee_id: Union[str, int] = None) -> Dict[str, Any]:
         """
         Fetch details for a specific employee.
         
@@ -253,12 +310,72 @@ def register_tools(mcp, client, company_ids):
         if employee_id is None:
             raise ValueError("employee_id is required")
             
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        employee_id_str = str(employee_id)
-        return client.get_employee_details(company_id_str, employee_id_str)
+        company_id_str = _to_id(company_id, default_company)
+        employee_id_str = _to_id(employee_id)
+        return await asyncio.to_thread(client.get_employee_details, company_id_str, employee_id_str)
+    
+    @mcp.tool()
+    async def fetch_employees_bulk(company_id: Optional[Union[str, int]] = None, employee_ids: List[Union[str, int]] = None) -> Dict[str, Any]:
+        """
+        Fetch details for several employees concurrently.
+        
+        Args:
+            company_id: Optional company ID (string or integer). If not provided, uses the first company ID from configuration.
+            employee_ids: List of employee IDs (strings or integers) to get details for.
+                Employees that fail to load map to {"error": message} instead of failing the call.
+        """
+        if not employee_ids:
+            raise ValueError("employee_ids is required")
+            
+        company_id_str = _to_id(company_id, default_company)
+        employee_id_strs = [_to_id(employee_id) for employee_id in employee_ids]
+        results = await asyncio.to_thread(client.get_employees_details_bulk, company_id_str, employee_id_strs)
+        # Preserve the caller's ordering; the client collects results as they complete
+        return {employee_id_str: results[employee_id_str] for employee_id_str in employee_id_strs}
+    
+    @mcp.tool()
+    async def fetch_employees_full(company_id: Optional[Union[str, int]] = None, employee_ids: List[Union[str, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch details, earnings and local taxes for several employees concurrently.
+        
+        Args:
+            company_id: Optional company ID (string or integer). If not provided, uses the first company ID from configuration.
+            employee_ids: List of employee IDs (strings or integers) to get complete records for.
+                A part (details, earnings or localTaxes) that fails to load is {"error": message}
+                instead of failing the call, so e.g. an employee without local taxes still
+                returns their details and earnings.
+        """
+        if not employee_ids:
+            raise ValueError("employee_ids is required")
+            
+        company_id_str = _to_id(company_id, default_company)
+        # Bound the number of employees in flight to stay within Paylocity rate limits
+        semaphore = asyncio.Semaphore(10)
+        
+        parts = (
+            ("details", client.get_employee_details),
+            ("earnings", client.get_employee_earnings),
+            ("localTaxes", client.get_employee_local_taxes)
+        )
+        
+        async def fetch_one(employee_id_str):
+            async with semaphore:
+                results = await asyncio.gather(
+                    *[asyncio.to_thread(func, company_id_str, employee_id_str) for _, func in parts],
+                    return_exceptions=True
+                )
+            record = {"id": employee_id_str}
+            for (name, _), result in zip(parts, results):
+                if isinstance(result, Exception):
+                    logger.warning("Failed to fetch %s for employee %s in company %s: %s", name, employee_id_str, company_id_str, str(result))
+                    result = {"error": str(result)}
+                record[name] = result
+            return record
+        
+        return await asyncio.gather(*[fetch_one(_to_id(employee_id)) for employee_id in employee_ids])
     
     @mcp.tool()
-    def fetch_employee_earnings(company_id: Optional[Union[str, int]] = None, employee_id: Union[str, int] = None) -> Dict[str, Any]:
+    async def fetch_employee_earnings(company_id: Optional[Union[str, int]] = None, employee_id: Union[str, int] = None) -> List[Dict[str, Any]]:
         """
         Fetch earnings data for a specific employee.
         
@@ -269,12 +386,12 @@ def register_tools(mcp, client, company_ids):
         if employee_id is None:
             raise ValueError("employee_id is required")
             
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        employee_id_str = str(employee_id)
-        return client.get_employee_earnings(company_id_str, employee_id_str)
+        company_id_str = _to_id(company_id, default_company)
+        employee_id_str = _to_id(employee_id)
+        return await asyncio.to_thread(client.get_employee_earnings, company_id_str, employee_id_str)
     
     @mcp.tool()
-    def fetch_company_codes(company_id: Optional[Union[str, int]] = None, code_resource: str = None) -> Dict[str, Any]:
+    async def fetch_company_codes(company_id: Optional[Union[str, int]] = None, code_resource: str = None) -> List[Dict[str, Any]]:
         """
         Fetch company codes for a specific resource.
         
@@ -285,11 +402,11 @@ def register_tools(mcp, client, company_ids):
         if code_resource is None:
             raise ValueError("code_resource is required")
             
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        return client.get_company_codes(company_id_str, code_resource)
+        company_id_str = _to_id(company_id, default_company)
+        return await asyncio.to_thread(client.get_company_codes, company_id_str, code_resource)
 
     @mcp.tool()
-    def fetch_employee_local_taxes(company_id: Optional[Union[str, int]] = None, employee_id: Union[str, int] = None) -> Dict[str, Any]:
+    async def fetch_employee_local_taxes(company_id: Optional[Union[str, int]] = None, employee_id: Union[str, int] = None) -> List[Dict[str, Any]]:
         """
         Fetch local taxes for a specific employee.
         
@@ -300,17 +417,17 @@ def register_tools(mcp, client, company_ids):
         if employee_id is None:
             raise ValueError("employee_id is required")
             
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        employee_id_str = str(employee_id)
-        return client.get_employee_local_taxes(company_id_str, employee_id_str)
+        company_id_str = _to_id(company_id, default_company)
+        employee_id_str = _to_id(employee_id)
+        return await asyncio.to_thread(client.get_employee_local_taxes, company_id_str, employee_id_str)
 
     @mcp.tool()
-    def fetch_employee_paystatement_details(
+    async def fetch_employee_paystatement_details(
         company_id: Optional[Union[str, int]] = None, 
         employee_id: Union[str, int] = None,
         year: Union[str, int] = None,
         check_date: str = None
-    ) -> Dict[str, Any]:
+    ) -> List[Dict[str, Any]]:
         """
         Fetch pay statement details for a specific employee, year and check date.
         
@@ -323,10 +440,10 @@ def register_tools(mcp, client, company_ids):
         if any(param is None for param in [employee_id, year, check_date]):
             raise ValueError("employee_id, year, and check_date are all required")
             
-        company_id_str = str(company_id) if company_id is not None else company_ids[0]
-        employee_id_str = str(employee_id)
+        company_id_str = _to_id(company_id, default_company)
+        employee_id_str = _to_id(employee_id)
         year_str = str(year)
-        return client.get_employee_paystatement_details(company_id_str, employee_id_str, year_str, check_date)
+        return await asyncio.to_thread(client.get_employee_paystatement_details, company_id_str, employee_id_str, year_str, check_date)
 
 # Expose important items at package level
 __all__ = ['main']
\ No newline at end of file
@@ -0,0 +1,215 @@
+import asyncio
+import math
+import logging
+import importlib.util
+from typing import Dict, Any, List
+import httpx
+from . import json_codec
+from .paylocity_client import PaylocityClient
+from .token_manager import TokenManager
+
+logger = logging.getLogger('mcppaylocity.async_client')
+
+# HTTP/2 multiplexing needs the optional h2 package
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Statuses worth retrying on idempotent requests
+_RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# Failures where the request never reached the server, so any method is safe to retry
+_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+def _retry_after(response, default):
+    """Seconds to wait before retrying, honoring a numeric Retry-After header"""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return default
+
+class AsyncPaylocityClient:
+    """Asynchronous Paylocity API client built on httpx.AsyncClient
+
+    Intended for callers that fan out many requests with asyncio.gather: concurrent
+    requests share one connection pool (multiplexed over HTTP/2 when h2 is
+    installed) without a thread per request. Tokens come from a TokenManager,
+    which can be shared with a PaylocityClient for the same credentials.
+    """
+
+    # Endpoint path templates, shared with the synchronous client
+    _URL_EMPLOYEES = PaylocityClient._URL_EMPLOYEES
+    _URL_EMPLOYEE = PaylocityClient._URL_EMPLOYEE
+    _URL_EARNINGS = PaylocityClient._URL_EARNINGS
+    _URL_CODES = PaylocityClient._URL_CODES
+    _URL_LOCAL_TAXES = PaylocityClient._URL_LOCAL_TAXES
+    _URL_PAYSTATEMENT_DETAILS = PaylocityClient._URL_PAYSTATEMENT_DETAILS
+    _URL_OPENAPI = PaylocityClient._URL_OPENAPI
+    _URL_SENSITIVE_DATA = PaylocityClient._URL_SENSITIVE_DATA
+
+    def __init__(self, client_id, client_secret, environment='production', scope='WebLinkAPI', token_manager=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.environment = environment
+        self.scope = scope
+        self.max_retries = 3
+        self.retry_delay = 1  # Initial retry delay in seconds
+        self.page_size = 500  # Employees requested per page
+
+        # Set base URL based on environment
+        self.base_url = "https://apisandbox.paylocity.com" if self.environment == 'testing' else "https://api.paylocity.com"
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            timeout=httpx.Timeout(30.0, connect=3.05)
+        )
+
+        # Reuse the caller's token manager so both clients share one token
+        if token_manager is None:
+            token_manager = TokenManager(self.base_url, client_id, client_secret, scope)
+        self.token_manager = token_manager
+
+        logger.info("AsyncPaylocityClient initialized with environment=%s, http2=%s", environment, _HTTP2_AVAILABLE)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the underlying connection pool"""
+        await self._client.aclose()
+
+    async def _get_access_token(self):
+        """Get a token without blocking the event loop when a refresh is needed"""
+        token = self.token_manager.get_cached_token()
+        if token:
+            return token
+        return await asyncio.to_thread(self.token_manager.get_access_token)
+
+    async def _make_request(self, method, endpoint, params=None, data=None, headers=None):
+        """Make an authenticated request to the Paylocity API with retry logic"""
+        logger.debug("Making %s request to: %s%s", method, self.base_url, endpoint)
+
+        retry_delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            # Get a fresh token for each attempt to ensure it's valid
+            token = await self._get_access_token()
+
+            request_headers = {"Authorization": "Bearer " + token}
+            if headers:
+                request_headers.update(headers)
+
+            try:
+                response = await self._client.request(method, endpoint, headers=request_headers, params=params, json=data)
+            except httpx.TransportError as e:
+                # Like the sync client's urllib3 policy: only GETs are retried once
+                # the request may have been sent
+                retryable = method == "GET" or isinstance(e, _CONNECT_ERRORS)
+                if retryable and attempt < self.max_retries:
+                    logger.warning("Request error: %s. Retry %d/%d in %ds", str(e), attempt + 1, self.max_retries, retry_delay)
+                    await asyncio.sleep(retry_delay)
+                    retry_delay *= 2
+                    continue
+                logger.error("Request failed: %s", str(e))
+                raise
+
+            # Check for token expiration (401) and retry with a new token
+            if response.status_code == 401 and attempt < self.max_retries:
+                logger.warning("Received 401 Unauthorized. Invalidating token and retrying...")
+                await asyncio.to_thread(self.token_manager.invalidate_token)
+                continue
+
+            # Back off on rate limiting and server errors for idempotent requests
+            if response.status_code in _RETRY_STATUSES and method == "GET" and attempt < self.max_retries:
+                delay = _retry_after(response, retry_delay)
+                logger.warning("Server returned %d. Retry %d/%d in %ss", response.status_code, attempt + 1, self.max_retries, delay)
+                await asyncio.sleep(delay)
+                retry_delay *= 2
+                continue
+
+            if response.is_error:
+                logger.error("HTTP error: %d - %s", response.status_code, response.text)
+                response.raise_for_status()
+            return response
+
+    async def _get_json(self, endpoint, params=None, headers=None):
+        """GET an endpoint and decode its JSON body"""
+        response = await self._make_request("GET", endpoint, params=params, headers=headers)
+        return json_codec.loads(response.content)
+
+    async def _get_employees_page(self, company_id, page_number):
+        """Get a single page of the company's employee list"""
+        params = {
+            "pagesize": self.page_size,
+            "pagenumber": page_number,
+            "includetotalcount": True
+        }
+        return await self._make_request("GET", self._URL_EMPLOYEES.format(company_id), params=params)
+
+    async def get_all_employees(self, company_id) -> List[Dict[str, Any]]:
+        """Get all employees, requesting every page after the first concurrently"""
+        first_page = await self._get_employees_page(company_id, 0)
+        employees = json_codec.loads(first_page.content)
+
+        total_count = int(first_page.headers.get("X-Pcty-Total-Count", len(employees)))
+        num_pages = math.ceil(total_count / self.page_size)
+        pages = await asyncio.gather(*[self._get_employees_page(company_id, page_number) for page_number in range(1, num_pages)])
+        for page in pages:
+            employees.extend(json_codec.loads(page.content))
+        return employees
+
+    async def get_employee_details(self, company_id, employee_id):
+        """Get detailed employee information"""
+        return await self._get_json(self._URL_EMPLOYEE.format(company_id, employee_id))
+
+    async def get_employees_details_bulk(self, company_id, employee_ids) -> Dict[str, Any]:
+        """Get details for several employees concurrently, keyed by employee ID
+
+        Failures are captured per employee as {"error": message}.
+        """
+        results = await asyncio.gather(
+            *[self.get_employee_details(company_id, employee_id) for employee_id in employee_ids],
+            return_exceptions=True
+        )
+        bulk = {}
+        for employee_id, result in zip(employee_ids, results):
+            if isinstance(result, Exception):
+                logger.warning("Bulk request failed for employee %s in company %s: %s", employee_id, company_id, str(result))
+                result = {"error": str(result)}
+            bulk[employee_id] = result
+        return bulk
+
+    async def get_employee_earnings(self, company_id, employee_id):
+        """Get all earnings for a specific employee"""
+        return await self._get_json(self._URL_EARNINGS.format(company_id, employee_id))
+
+    async def get_company_codes(self, company_id, code_resource):
+        """Get company codes for a specific resource"""
+        return await self._get_json(self._URL_CODES.format(company_id, code_resource))
+
+    async def get_employee_local_taxes(self, company_id, employee_id):
+        """Get all local taxes for a specific employee"""
+        return await self._get_json(self._URL_LOCAL_TAXES.format(company_id, employee_id))
+
+    async def get_employee_paystatement_details(self, company_id, employee_id, year, check_date):
+        """Get employee pay statement details for a specific year and check date"""
+        return await self._get_json(self._URL_PAYSTATEMENT_DETAILS.format(company_id, employee_id, year, check_date))
+
+    async def get_company_openapi_doc(self, company_id):
+        """Get company-specific Open API documentation"""
+        return await self._get_json(self._URL_OPENAPI.format(company_id), headers={"Accept": "application/json"})
+
+    async def get_employee_data(self, employee_id: str, company_id: str) -> Dict[str, Any]:
+        """Retrieve sensitive data for a specific employee"""
+        try:
+            return await self._get_json(self._URL_SENSITIVE_DATA.format(company_id, employee_id))
+        except Exception as e:
+            logger.error(
+                "Failed to retrieve employee data for employee %s in company %s: %s",
+                employee_id,
+                company_id,
+                str(e),
+            )
+            raise RuntimeError("Unable to fetch employee sensitive data") from e
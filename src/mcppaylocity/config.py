@@ -0,0 +1,68 @@
+"""
+Server configuration read from the environment.
+"""
+
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+def _default_uds_path() -> str:
+    """Socket path in the per-user runtime directory, or a per-user temp directory
+    
+    Only called for the uds transport: os.getuid does not exist on Windows.
+    """
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        runtime_dir = os.path.join(tempfile.gettempdir(), "mcppaylocity-{}".format(os.getuid()))
+    return os.path.join(runtime_dir, "mcppaylocity.sock")
+
+def _positive_int_env(name, default):
+    """Read a positive integer environment variable, naming it in any error"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError("{} must be an integer, got {!r}".format(name, value)) from None
+    if number < 1:
+        raise ValueError("{} must be at least 1, got {}".format(name, number))
+    return number
+
+@dataclass(frozen=True)
+class Config:
+    """Paylocity settings, read once at startup and shared by the server components"""
+    client_id: Optional[str]
+    client_secret: Optional[str]
+    company_ids: Tuple[str, ...]
+    environment: str = "production"
+    max_inflight: int = 10
+    transport: str = "stdio"
+    uds_path: Optional[str] = None  # None means the per-user default, see socket_path
+    token_info: bool = False
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        """Build the configuration from the PAYLOCITY_* and MCP_* environment variables"""
+        company_ids_str = os.getenv("PAYLOCITY_COMPANY_IDS", "")
+        return cls(
+            client_id=os.getenv("PAYLOCITY_CLIENT_ID"),
+            client_secret=os.getenv("PAYLOCITY_CLIENT_SECRET"),
+            company_ids=tuple(id.strip() for id in company_ids_str.split(",") if id.strip()),
+            environment=os.getenv("PAYLOCITY_ENVIRONMENT", "production"),
+            max_inflight=_positive_int_env("PAYLOCITY_MAX_INFLIGHT", 10),
+            transport=os.getenv("MCP_TRANSPORT", "stdio"),
+            uds_path=os.getenv("MCP_UDS_PATH") or None,
+            token_info=os.getenv("PAYLOCITY_TOKEN_INFO", "").lower() in ("1", "true", "yes"),
+        )
+
+    @property
+    def default_company_id(self) -> str:
+        """Company ID used when a request does not name one"""
+        return self.company_ids[0]
+
+    @property
+    def socket_path(self) -> str:
+        """Unix domain socket path for the uds transport"""
+        return self.uds_path or _default_uds_path()
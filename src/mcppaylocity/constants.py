@@ -0,0 +1,18 @@
+"""
+Static configuration shared by the Paylocity MCP server modules.
+"""
+
+# Register custom URI scheme for paylocity resources
+PAYLOCITY_SCHEME = "paylocity"
+
+# MIME type of the pre-serialized resource payloads
+JSON_MIME_TYPE = "application/json"
+
+# Default instructions presented in the MCP handshake
+INSTRUCTIONS = (
+    "This server exposes Paylocity resources and tools. "
+    "Use the provided resources to fetch employee, payroll and code data."
+)
+
+# Package version used in the handshake
+SERVER_VERSION = "0.1.0"
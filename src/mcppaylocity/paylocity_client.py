@@ -1,153 +1,397 @@
+import math
 import time
 import logging
-from typing import Dict, Any
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Iterator, List
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from . import json_codec
 from .token_manager import TokenManager
+from .ttl_cache import TTLCache
 
 logger = logging.getLogger('mcppaylocity.client')
 
+# (Session, TokenManager, in-flight semaphore, max_inflight) shared by every
+# client created for the same base URL and credentials, so they reuse one warm
+# connection pool and token and stay under one rate-limit cap together
+_transports = {}
+_transports_lock = threading.Lock()
+
+def _is_transient(error):
+    """Whether a failed request may succeed later: connection problems, timeouts, 429 and 5xx"""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and (error.response.status_code == 429 or error.response.status_code >= 500)
+    return isinstance(error, (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        requests.exceptions.RetryError
+    ))
+
+def _is_today(check_date):
+    """Check whether a check date (MM/DD/YYYY or YYYY-MM-DD) is today's date"""
+    check_date = str(check_date)
+    return check_date in (time.strftime('%m/%d/%Y'), time.strftime('%Y-%m-%d'))
+
 class PaylocityClient:
-    def __init__(self, client_id, client_secret, environment='production', scope='WebLinkAPI'):
+    # Endpoint path templates, formatted with company/employee IDs per call
+    _URL_EMPLOYEES = "/api/v2/companies/{}/employees"
+    _URL_EMPLOYEE = "/api/v2/companies/{}/{}"
+    _URL_EARNINGS = "/api/v2/companies/{}/{}/earnings"
+    _URL_CODES = "/api/v2/companies/{}/codes/{}"
+    _URL_LOCAL_TAXES = "/api/v2/companies/{}/{}/localTaxes"
+    _URL_PAYSTATEMENT_DETAILS = "/api/v2/companies/{}/{}/paystatement/details/{}/{}"
+    _URL_OPENAPI = "/api/v2/companies/{}/openapi"
+    _URL_SENSITIVE_DATA = "/api/v2/companies/{}/{}/sensitivedata"
+
+    # Fixed attribute layout: no per-instance __dict__
+    __slots__ = (
+        "client_id", "client_secret", "environment", "scope",
+        "max_retries", "retry_backoff", "connect_timeout", "request_timeout",
+        "page_size", "max_page_workers", "max_bulk_workers", "max_inflight", "max_stale", "_inflight",
+        "base_url", "session", "token_manager",
+        "_employees_cache", "_employee_details_cache", "_codes_cache", "_local_taxes_cache",
+        "_paystatement_cache", "_openapi_cache", "_validators", "_not_found_cache"
+    )
+
+    def __init__(self, client_id, client_secret, environment='production', scope='WebLinkAPI', max_inflight=10, token_info=False):
         self.client_id = client_id
         self.client_secret = client_secret
         self.environment = environment
         self.scope = scope
         self.max_retries = 3
-        self.retry_delay = 1  # Initial retry delay in seconds
+        self.retry_backoff = 0.5  # urllib3 backoff factor between retries
+        self.connect_timeout = 3.05  # Connection timeout in seconds
         self.request_timeout = 30  # Request timeout in seconds
+        self.page_size = 500  # Employees requested per page
+        self.max_page_workers = 8  # Concurrent page requests when paginating
+        self.max_bulk_workers = 16  # Concurrent per-employee requests in bulk calls
+        self.max_stale = 900  # Longest a cached response is served past its TTL when the API is down, in seconds
         
         # Set base URL based on environment
         self.base_url = "https://apisandbox.paylocity.com" if self.environment == 'testing' else "https://api.paylocity.com"
         
-        # Initialize token manager
-        self.token_manager = TokenManager(self.base_url, client_id, client_secret, scope)
+        # Short-lived caches for read-mostly endpoints, keyed by endpoint path
+        # (which always includes the company ID) and query parameters
+        self._employees_cache = TTLCache(maxsize=1024, ttl=300)
+        self._employee_details_cache = TTLCache(maxsize=1024, ttl=600)
+        self._codes_cache = TTLCache(maxsize=1024, ttl=3600)
+        self._local_taxes_cache = TTLCache(maxsize=1024, ttl=600)
+        self._paystatement_cache = TTLCache(maxsize=1024, ttl=600)
+        self._openapi_cache = TTLCache(maxsize=128, ttl=3600)
+        # ETag / Last-Modified validators of cached responses, used to
+        # revalidate them once their TTL expires
+        self._validators = TTLCache(maxsize=4096, ttl=24 * 3600)
+        # 404 responses to GETs (e.g. localTaxes for an employee without any),
+        # so repeated lookups fail fast instead of costing a round trip
+        self._not_found_cache = TTLCache(maxsize=4096, ttl=300)
+        
+        # Reuse the session, token manager and in-flight cap of an earlier client
+        # for the same credentials, or create and register them. The semaphore is
+        # shared back-pressure so concurrent callers stay under Paylocity's
+        # per-client rate limit (and the pool size) instead of triggering 429s
+        key = (self.base_url, client_id, client_secret, scope)
+        with _transports_lock:
+            transport = _transports.get(key)
+            created = transport is None
+            if created:
+                session = self._build_session(max_inflight)
+                token_manager = TokenManager(self.base_url, client_id, client_secret, scope, session=session, write_token_info=token_info)
+                transport = _transports[key] = (session, token_manager, threading.BoundedSemaphore(max_inflight), max_inflight)
+        self.session, self.token_manager, self._inflight, self.max_inflight = transport
+        
+        if not created:
+            if max_inflight != self.max_inflight:
+                logger.warning("Ignoring max_inflight=%d: clients for this API client ID already share a limit of %d", max_inflight, self.max_inflight)
+            if token_info != self.token_manager.write_token_info:
+                logger.warning("Ignoring token_info=%s: the shared token manager for this API client ID uses token_info=%s", token_info, self.token_manager.write_token_info)
+        
+        if created:
+            self.token_manager.start_background_refresh()
+            # Fetch the token in the background; the token POST shares the API
+            # pool, so the first real request also skips the TCP/TLS handshakes
+            threading.Thread(target=self._warm_pool, name="paylocity-warm-pool", daemon=True).start()
         
         logger.info("PaylocityClient initialized with environment=%s", environment)
         
     def _make_request(self, method, endpoint, params=None, data=None, headers=None):
-        """Make an authenticated request to the Paylocity API with retry logic"""
-        url = "{}{}".format(self.base_url, endpoint)
-        logger.info("Making %s request to: %s", method, url)
+        """Make an authenticated request to the Paylocity API
+        
+        Timeouts, connection errors and 429/5xx responses are retried by the
+        session's HTTPAdapter; only 401 is handled here since it needs a new token.
+        """
+        url = self.base_url + endpoint
+        logger.debug("Making %s request to: %s", method, url)
         
-        # Implement retry logic with exponential backoff
-        current_retry = 0
-        retry_delay = self.retry_delay
-        last_exception = None
+        not_found_key = (endpoint, frozenset(params.items()) if params else None) if method == "GET" else None
+        if not_found_key is not None:
+            not_found = self._not_found_cache.get(not_found_key)
+            if not_found is not None:
+                logger.debug("Cached 404 for %s", url)
+                raise requests.exceptions.HTTPError("404 Client Error: Not Found (cached) for url: {}".format(url), response=not_found)
         
-        while current_retry <= self.max_retries:
+        for attempt in range(self.max_retries + 1):
+            # Get a fresh token for each attempt to ensure it's valid
+            token = self.token_manager.get_access_token()
+            
+            # Session supplies the shared headers; only the token varies per call
+            # and is passed as a per-request override
+            request_headers = {"Authorization": "Bearer " + token}
+            
+            if headers:
+                request_headers.update(headers)
+            
+            if not self._inflight.acquire(blocking=False):
+                logger.debug("Waiting for one of %d in-flight request slots: %s", self.max_inflight, url)
+                self._inflight.acquire()
             try:
-                # Get a fresh token for each attempt to ensure it's valid
-                token = self.token_manager.get_access_token()
-                
-                default_headers = {
-                    "Authorization": "Bearer {}".format(token),
-                    "Content-Type": "application/json"
-                }
-                
-                if headers:
-                    default_headers.update(headers)
-                
-                response = requests.request(
+                response = self.session.request(
                     method, 
                     url, 
-                    headers=default_headers, 
+                    headers=request_headers, 
                     params=params, 
                     json=data,
-                    timeout=self.request_timeout
+                    timeout=(self.connect_timeout, self.request_timeout)
                 )
-                
-                # Check for token expiration (401) and retry with a new token
-                if response.status_code == 401:
-                    if current_retry < self.max_retries:
-                        logger.warning("Received 401 Unauthorized. Invalidating token and retrying...")
-                        self.token_manager.invalidate_token()
-                        current_retry += 1
-                        time.sleep(retry_delay)
-                        retry_delay *= 2
-                        continue
-                
-                # Raise exception for other error status codes
+            except requests.exceptions.RequestException as e:
+                logger.error("Request failed after maximum retries: %s", str(e))
+                raise
+            finally:
+                self._inflight.release()
+            
+            # Check for token expiration (401) and retry with a new token
+            if response.status_code == 401 and attempt < self.max_retries:
+                logger.warning("Received 401 Unauthorized. Invalidating token and retrying...")
+                self.token_manager.invalidate_token()
+                # A 404 seen with the old token may have been an authorization artifact
+                self._not_found_cache.clear()
+                continue
+            
+            if response.status_code == 404 and not_found_key is not None:
+                self._not_found_cache.set(not_found_key, response)
+            
+            try:
                 response.raise_for_status()
-                return response
-                
-            except requests.exceptions.Timeout as e:
-                last_exception = e
-                current_retry += 1
-                if current_retry <= self.max_retries:
-                    logger.warning("Request timed out. Retry %d/%d in %ds", current_retry, self.max_retries, retry_delay)
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                else:
-                    logger.error("Request failed after maximum retries due to timeout: %s", str(e))
-                    raise
-                    
-            except requests.exceptions.ConnectionError as e:
-                last_exception = e
-                current_retry += 1
-                if current_retry <= self.max_retries:
-                    logger.warning("Connection error: %s. Retry %d/%d in %ds", str(e), current_retry, self.max_retries, retry_delay)
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                else:
-                    logger.error("Request failed after maximum retries due to connection error: %s", str(e))
-                    raise
-                    
             except requests.exceptions.HTTPError as e:
-                # For 5xx errors (server errors), retry
-                if 500 <= e.response.status_code < 600 and current_retry < self.max_retries:
-                    last_exception = e
-                    current_retry += 1
-                    logger.warning("Server error %d. Retry %d/%d in %ds", e.response.status_code, current_retry, self.max_retries, retry_delay)
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                else:
-                    # For other HTTP errors, don't retry
-                    logger.error("HTTP error: %d - %s", e.response.status_code, e.response.text)
-                    raise
-                    
-            except Exception as e:
-                logger.error("Unexpected error making request: %s", str(e))
+                logger.error("HTTP error: %d - %s", e.response.status_code, e.response.text)
                 raise
+            return response
+
+    def _build_session(self, max_inflight):
+        """Create the HTTP session used for all API and token requests"""
+        # Reuse keep-alive connections across requests instead of paying
+        # a fresh TCP + TLS handshake for every API call. Transient failures
+        # on idempotent requests are retried inside urllib3, honoring Retry-After.
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.retry_backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=max(20, max_inflight), max_retries=retry))
+        # No session-wide Content-Type: GETs carry no body, and requests sets
+        # application/json itself whenever a json= payload is sent.
+        # requests already advertises Brotli when the brotli package is installed
+        return session
+
+    def _warm_pool(self):
+        """Get an access token, leaving a keep-alive connection in the shared pool"""
+        try:
+            self.token_manager.get_access_token()
+            logger.debug("Connection pool warmed for %s", self.base_url)
+        except Exception as e:
+            logger.warning("Connection pool warm-up failed: %s", str(e))
+
+    def clear_caches(self):
+        """Drop all cached responses, including remembered 404s"""
+        for cache in (
+            self._employees_cache,
+            self._employee_details_cache,
+            self._codes_cache,
+            self._local_taxes_cache,
+            self._paystatement_cache,
+            self._openapi_cache,
+            self._validators,
+            self._not_found_cache
+        ):
+            cache.clear()
+
+    def _json(self, response):
+        """Decode a response body, using orjson when it is available"""
+        return json_codec.loads(response.content)
+
+    def _get_json(self, endpoint, params=None, headers=None):
+        """GET an endpoint and decode its JSON body"""
+        return self._json(self._make_request("GET", endpoint, params=params, headers=headers))
+
+    def _cached_get(self, cache, endpoint, params=None, headers=None):
+        """GET an endpoint through a TTL cache, falling back to a stale value on failure"""
+        key = (
+            endpoint,
+            frozenset(params.items()) if params else None,
+            frozenset(headers.items()) if headers else None
+        )
+        return self._cached_call(cache, key, endpoint, lambda: self._revalidating_get(cache, key, endpoint, params, headers))
+
+    def _revalidating_get(self, cache, key, endpoint, params=None, headers=None):
+        """GET an endpoint, revalidating an expired cached copy with its ETag / Last-Modified
+        
+        A 304 Not Modified response reuses the cached body without transferring
+        or parsing it again.
+        """
+        validators = self._validators.get(key)
+        stale = cache.get_stale(key) if validators else None
+        
+        request_headers = dict(headers) if headers else {}
+        if stale is not None:
+            etag, last_modified = validators
+            if etag:
+                request_headers["If-None-Match"] = etag
+            if last_modified:
+                request_headers["If-Modified-Since"] = last_modified
         
-        # If we've exhausted retries, raise the last exception
-        if last_exception:
-            raise last_exception
+        response = self._make_request("GET", endpoint, params=params, headers=request_headers or None)
+        if response.status_code == 304 and stale is not None:
+            logger.debug("Not modified: %s", endpoint)
+            return stale
+        
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._validators.set(key, (etag, last_modified))
+        return self._json(response)
+
+    def _cached_call(self, cache, key, endpoint, fetch):
+        """Return a fresh cached value for key, or call fetch and cache its result
+        
+        When the API is temporarily unavailable, a recently expired value is
+        served instead. Definitive errors such as 403 or 404 are raised and
+        drop the cached value, so revoked or deleted records are not served.
+        """
+        cached = cache.get(key)
+        if cached is not None:
+            logger.debug("Cache hit for %s", endpoint)
+            return cached
+        
+        try:
+            result = fetch()
+        except Exception as e:
+            if not _is_transient(e):
+                cache.delete(key)
+                raise
+            stale = cache.get_stale(key, max_stale=self.max_stale)
+            if stale is None:
+                raise
+            logger.warning("Request to %s failed: %s. Serving stale cached response", endpoint, str(e))
+            return stale
+        
+        cache.set(key, result)
+        return result
 
-    def get_all_employees(self, company_id) -> Dict[str, Any]:
-        """Get all employees with automatic token management"""
-        endpoint = "/api/v2/companies/{}/employees".format(company_id)
+    def _get_employees_page(self, company_id, page_number):
+        """Get a single page of the company's employee list"""
+        endpoint = self._URL_EMPLOYEES.format(company_id)
         
         params = {
-            "pagesize": 100,
-            "pagenumber": 0,
+            "pagesize": self.page_size,
+            "pagenumber": page_number,
             "includetotalcount": True
         }
         
+        return self._make_request("GET", endpoint, params=params)
+
+    def _get_employees_page_json(self, company_id, page_number):
+        """Get and decode a single page, so its raw body can be freed right away"""
+        return self._json(self._get_employees_page(company_id, page_number))
+
+    def iter_employees(self, company_id, ordered=True) -> Iterator[Dict[str, Any]]:
+        """Yield every employee of a company, walking all pages of the employee list
+        
+        The first page reports the total count; the remaining pages are then
+        requested and decoded concurrently. They are yielded in page order, or
+        as soon as each page arrives when ordered is False. Only decoded pages
+        that have not been yielded yet are held in memory.
+        """
+        first_page = self._get_employees_page(company_id, 0)
+        employees = self._json(first_page)
+        yield from employees
+        
+        total_count = int(first_page.headers.get("X-Pcty-Total-Count", len(employees)))
+        num_pages = math.ceil(total_count / self.page_size)
+        if num_pages <= 1:
+            return
+        
+        logger.debug("Fetching %d more employee pages for company %s", num_pages - 1, company_id)
+        with ThreadPoolExecutor(max_workers=min(num_pages - 1, self.max_page_workers)) as executor:
+            futures = [executor.submit(self._get_employees_page_json, company_id, page_number) for page_number in range(1, num_pages)]
+            if ordered:
+                # Pop each future so a page is released once it has been yielded
+                futures = deque(futures)
+                while futures:
+                    yield from futures.popleft().result()
+            else:
+                # as_completed owns the futures and drops each one as it is yielded
+                pending = as_completed(futures)
+                del futures
+                for future in pending:
+                    yield from future.result()
+
+    def get_all_employees(self, company_id) -> List[Dict[str, Any]]:
+        """Get all employees across every page with automatic token management"""
+        endpoint = self._URL_EMPLOYEES.format(company_id)
+        
         try:
-            return self._make_request("GET", endpoint, params=params).json()
+            return self._cached_call(self._employees_cache, endpoint, endpoint, lambda: list(self.iter_employees(company_id)))
         except Exception as e:
             logger.error("Failed to get employees for company %s: %s", company_id, str(e))
             raise
 
     def get_employee_details(self, company_id, employee_id):
         """Get detailed employee information with automatic token management"""
-        endpoint = "/api/v2/companies/{}/{}".format(company_id, employee_id)
-        return self._make_request("GET", endpoint).json()
+        endpoint = self._URL_EMPLOYEE.format(company_id, employee_id)
+        return self._cached_get(self._employee_details_cache, endpoint)
+
+    def _fan_out(self, func, company_id, employee_ids):
+        """Call func(company_id, employee_id) for each employee concurrently
+        
+        Failures are captured per employee as {"error": message} so a single
+        missing employee does not abort the rest of the batch.
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(len(employee_ids), self.max_bulk_workers) or 1) as executor:
+            futures = {executor.submit(func, company_id, employee_id): employee_id for employee_id in employee_ids}
+            for future in as_completed(futures):
+                employee_id = futures[future]
+                try:
+                    results[employee_id] = future.result()
+                except Exception as e:
+                    logger.warning("Bulk request failed for employee %s in company %s: %s", employee_id, company_id, str(e))
+                    results[employee_id] = {"error": str(e)}
+        return results
+
+    def get_employees_details_bulk(self, company_id, employee_ids) -> Dict[str, Any]:
+        """Get details for several employees concurrently, keyed by employee ID"""
+        return self._fan_out(self.get_employee_details, company_id, employee_ids)
 
     def get_employee_earnings(self, company_id, employee_id):
         """Get all earnings for a specific employee"""
-        endpoint = "/api/v2/companies/{}/{}/earnings".format(company_id, employee_id)
-        return self._make_request("GET", endpoint).json()
+        endpoint = self._URL_EARNINGS.format(company_id, employee_id)
+        return self._get_json(endpoint)
 
     def get_company_codes(self, company_id, code_resource):
         """Get company codes for a specific resource"""
-        endpoint = "/api/v2/companies/{}/codes/{}".format(company_id, code_resource)
-        return self._make_request("GET", endpoint).json()
+        endpoint = self._URL_CODES.format(company_id, code_resource)
+        return self._cached_get(self._codes_cache, endpoint)
 
     def get_employee_local_taxes(self, company_id, employee_id):
         """Get all local taxes for a specific employee"""
-        endpoint = "/api/v2/companies/{}/{}/localTaxes".format(company_id, employee_id)
-        return self._make_request("GET", endpoint).json()
+        endpoint = self._URL_LOCAL_TAXES.format(company_id, employee_id)
+        return self._cached_get(self._local_taxes_cache, endpoint)
 
     def get_employee_paystatement_details(self, company_id, employee_id, year, check_date):
         """Get employee pay statement details for a specific year and check date
@@ -158,14 +402,18 @@ class PaylocityClient:
             year: The year to get pay statement details for
             check_date: The check date to get pay statement details for
         """
-        endpoint = "/api/v2/companies/{}/{}/paystatement/details/{}/{}".format(company_id, employee_id, year, check_date)
-        return self._make_request("GET", endpoint).json()
+        endpoint = self._URL_PAYSTATEMENT_DETAILS.format(company_id, employee_id, year, check_date)
+        
+        # Today's pay statement may still be changing, so always fetch it fresh
+        if _is_today(check_date):
+            return self._get_json(endpoint)
+        return self._cached_get(self._paystatement_cache, endpoint)
 
     def get_company_openapi_doc(self, company_id):
         """Get company-specific Open API documentation"""
-        endpoint = "/api/v2/companies/{}/openapi".format(company_id)
+        endpoint = self._URL_OPENAPI.format(company_id)
         headers = {"Accept": "application/json"}
-        return self._make_request("GET", endpoint, headers=headers).json()
+        return self._cached_get(self._openapi_cache, endpoint, headers=headers)
 
     def get_employee_data(self, employee_id: str, company_id: str) -> Dict[str, Any]:
         """
@@ -178,11 +426,10 @@ class PaylocityClient:
         Returns:
             dict: The employee data response
         """
-        endpoint = '/api/v2/companies/{}/{}/sensitivedata'.format(company_id, employee_id)
+        endpoint = self._URL_SENSITIVE_DATA.format(company_id, employee_id)
         
         try:
-            response = self._make_request('GET', endpoint)
-            return response.json()
+            return self._get_json(endpoint)
         except Exception as e:
             logger.error(
                 "Failed to retrieve employee data for employee %s in company %s: %s",
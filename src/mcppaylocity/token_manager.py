@@ -2,14 +2,34 @@ import os
 import time
 import json
 import base64
+import threading
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from typing import Dict, Any
+from . import json_codec
 
 logger = logging.getLogger('mcppaylocity.token_manager')
 
+# Token endpoint statuses worth retrying
+_RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
 class TokenManager:
-    def __init__(self, base_url, client_id, client_secret, scope='WebLinkAPI'):
+    # Parsed token cache files shared by all instances in the process, as
+    # path -> (mtime_ns, payload), so an unchanged file is never parsed twice
+    _cached_payloads = {}
+
+    # Fixed attribute layout: no per-instance __dict__
+    __slots__ = (
+        "base_url", "client_id", "client_secret", "scope",
+        "access_token", "token_expiry", "max_retries", "retry_delay", "session",
+        "expiry_margin", "refresh_ahead", "_token_url", "_token_headers", "_token_body",
+        "_token_state", "_token_lock", "_token_available", "_refresh_thread",
+        "token_dir", "token_file", "token_info_file", "write_token_info"
+    )
+
+    def __init__(self, base_url, client_id, client_secret, scope='WebLinkAPI', session=None, write_token_info=False):
         self.base_url = base_url
         self.client_id = client_id
         self.client_secret = client_secret
@@ -18,96 +38,189 @@ class TokenManager:
         self.token_expiry = None
         self.max_retries = 3
         self.retry_delay = 1  # Initial retry delay in seconds
+        # Share the API client's session when one is provided; otherwise build one
+        # whose adapter retries connect failures the same way PaylocityClient's does
+        if session is None:
+            session = requests.Session()
+            retry = Retry(
+                total=self.max_retries,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET"]),
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+            session.mount("https://", HTTPAdapter(max_retries=retry))
+        self.session = session
+        self.expiry_margin = 30  # Treat the in-memory token as expired this many seconds early
+        self.refresh_ahead = 60  # Background refresh this many seconds before expiry
+        
+        # The token request never changes for this client, so build it once
+        credentials = f"{client_id}:{client_secret}"
+        encoded_credentials = base64.b64encode(credentials.encode('utf-8')).decode('utf-8')
+        self._token_url = f"{base_url}/IdentityServer/connect/token"
+        self._token_headers = {
+            "Authorization": f"Basic {encoded_credentials}",
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+        self._token_body = {
+            "grant_type": "client_credentials",
+            "scope": scope
+        }
+        
+        # In-memory token state as (token, expiry deadline, refresh deadline) on the
+        # monotonic clock, replaced as a whole so readers never see a torn update
+        self._token_state = None
+        self._token_lock = threading.Lock()
+        self._token_available = threading.Event()
+        self._refresh_thread = None
         
         # Keep token storage in access_token directory
         self.token_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'access_token')
         os.makedirs(self.token_dir, exist_ok=True)
         self.token_file = os.path.join(self.token_dir, 'token.json')
         self.token_info_file = os.path.join(self.token_dir, 'token_info.txt')
+        self.write_token_info = write_token_info  # Also write the human-readable token_info.txt
         
         logger.info("TokenManager initialized with base_url=%s", base_url)
         logger.info("Token cache directory: %s", self.token_dir)
 
     def get_access_token(self) -> str:
         """Get a valid access token, either from cache or by requesting a new one"""
-        if self._load_cached_token():
-            logger.debug("Using cached token")
-            return self.access_token
+        token = self.get_cached_token()
+        if token:
+            return token
+        
+        # Only one thread refreshes; the others wait and reuse its token
+        with self._token_lock:
+            token = self.get_cached_token()
+            if token:
+                return token
+            
+            # The cache file only holds tokens this process wrote once it has one in
+            # memory, so only read it at startup or after invalidation
+            if self._token_state is None and self._load_cached_token():
+                logger.debug("Using cached token")
+                return self.access_token
+
+            logger.info("Getting new access token...")
+            return self._request_new_token()
+
+    def get_cached_token(self):
+        """Return the in-memory token if it is not about to expire, without blocking or refreshing"""
+        state = self._token_state
+        if state is not None and time.monotonic() + self.expiry_margin < state[1]:
+            return state[0]
+        return None
+
+    def _set_token(self, token, expiry):
+        """Store a token in memory along with its wall-clock expiry time"""
+        now = time.monotonic()
+        lifetime = expiry - time.time()
+        self.access_token = token
+        self.token_expiry = expiry
+        self._token_state = (token, now + lifetime, now + max(lifetime - self.refresh_ahead, lifetime / 2))
+        self._token_available.set()
+
+    def start_background_refresh(self):
+        """Start a daemon thread that refreshes the token shortly before it expires"""
+        if self._refresh_thread is not None:
+            return
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name="paylocity-token-refresh", daemon=True)
+        self._refresh_thread.start()
 
-        logger.info("Getting new access token...")
-        return self._request_new_token()
+    def _refresh_loop(self):
+        """Keep the token fresh so requests never block on a refresh"""
+        while True:
+            self._token_available.wait()
+            state = self._token_state
+            if state is None:
+                continue
+            
+            delay = state[2] - time.monotonic()
+            if delay > 0:
+                # Re-check afterwards: the token may have been replaced or invalidated meanwhile
+                time.sleep(delay)
+                continue
+            
+            try:
+                with self._token_lock:
+                    if self._token_state is state:
+                        logger.info("Refreshing access token before expiry...")
+                        self._request_new_token()
+            except Exception as e:
+                logger.warning("Background token refresh failed: %s", str(e))
+                time.sleep(self.refresh_ahead / 2)
     
+    def _post_token_request(self):
+        """POST the token request, retrying read timeouts and 429/5xx
+        
+        Connect failures are already retried for every method by the session's
+        adapter. Read timeouts and transient statuses are not retried there for
+        POSTs, but requesting a client-credentials token is safe to repeat, so
+        they are retried here on the same connection pool.
+        """
+        retry_delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Short connect timeout: the token lock is held while this runs
+                response = self.session.post(self._token_url, headers=self._token_headers, data=self._token_body, timeout=(3.05, 30))
+            except requests.exceptions.ReadTimeout as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning("Token request failed: %s. Retry %d/%d in %ds", str(e), attempt + 1, self.max_retries, retry_delay)
+            else:
+                if response.status_code not in _RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                logger.warning("Token endpoint returned %d. Retry %d/%d in %ds", response.status_code, attempt + 1, self.max_retries, retry_delay)
+            time.sleep(retry_delay)
+            retry_delay *= 2  # Exponential backoff
+
     def _request_new_token(self) -> str:
         """Request a new access token from the Paylocity API with retry logic"""
-        url = f"{self.base_url}/IdentityServer/connect/token"
-        
-        credentials = f"{self.client_id}:{self.client_secret}"
-        encoded_credentials = base64.b64encode(credentials.encode('utf-8')).decode('utf-8')
+        try:
+            response = self._post_token_request()
+            response.raise_for_status()
+            
+            token_data = response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error("Failed to get token after maximum retries: %s", str(e))
+            raise
+        except Exception as e:
+            logger.error("Unexpected error getting access token: %s", str(e))
+            raise
         
-        headers = {
-            "Authorization": f"Basic {encoded_credentials}",
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
+        self._set_token(token_data['access_token'], time.time() + token_data['expires_in'])
         
-        data = {
-            "grant_type": "client_credentials",
-            "scope": self.scope
-        }
+        # Save token with a buffer time to ensure we refresh before expiry
+        self._save_token_to_cache(self.access_token, self.token_expiry)
+        logger.info("Successfully obtained new token, expires in %d seconds", token_data['expires_in'])
         
-        # Implement retry logic with exponential backoff
-        current_retry = 0
-        retry_delay = self.retry_delay
-        
-        while current_retry <= self.max_retries:
-            try:
-                response = requests.post(url, headers=headers, data=data, timeout=30)  # Add timeout
-                response.raise_for_status()
-                
-                token_data = response.json()
-                self.access_token = token_data['access_token']
-                self.token_expiry = time.time() + token_data['expires_in']
-                
-                # Save token with a buffer time to ensure we refresh before expiry
-                self._save_token_to_cache(self.access_token, self.token_expiry)
-                logger.info("Successfully obtained new token, expires in %d seconds", token_data['expires_in'])
-                
-                return self.access_token
-            except requests.exceptions.Timeout:
-                current_retry += 1
-                if current_retry <= self.max_retries:
-                    logger.warning("Token request timed out. Retry %d/%d in %ds", current_retry, self.max_retries, retry_delay)
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    logger.error("Failed to get token after maximum retries")
-                    raise
-            except requests.exceptions.RequestException as e:
-                current_retry += 1
-                if current_retry <= self.max_retries:
-                    logger.warning("Token request failed: %s. Retry %d/%d in %ds", str(e), current_retry, self.max_retries, retry_delay)
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    logger.error("Failed to get token after maximum retries: %s", str(e))
-                    raise
-            except Exception as e:
-                logger.error("Unexpected error getting access token: %s", str(e))
-                raise
+        return self.access_token
 
     def _load_cached_token(self) -> bool:
         """Load token from cache file if it exists and is still valid"""
         try:
-            if os.path.exists(self.token_file):
+            mtime = os.stat(self.token_file).st_mtime_ns
+        except OSError:
+            return False
+        
+        try:
+            cached = TokenManager._cached_payloads.get(self.token_file)
+            if cached is not None and cached[0] == mtime:
+                token_data = cached[1]
+            else:
                 with open(self.token_file, 'r', encoding='utf-8') as f:
                     token_data = json.load(f)
-                    # Use a 10-minute buffer to ensure we refresh well before expiry
-                    # This helps prevent issues with the 5-minute Smithery timeout
-                    if token_data['expiry'] > time.time() + 600:  # 10 minutes buffer
-                        self.access_token = token_data['token']
-                        self.token_expiry = token_data['expiry']
-                        return True
-                    else:
-                        logger.info("Cached token is expired or about to expire")
+                TokenManager._cached_payloads[self.token_file] = (mtime, token_data)
+            
+            # Use a 10-minute buffer to ensure we refresh well before expiry
+            # This helps prevent issues with the 5-minute Smithery timeout
+            if token_data['expiry'] > time.time() + 600:  # 10 minutes buffer
+                self._set_token(token_data['token'], token_data['expiry'])
+                return True
+            else:
+                logger.info("Cached token is expired or about to expire")
         except json.JSONDecodeError as e:
             logger.warning("Invalid JSON in token cache file: %s", str(e))
             # Remove corrupted cache file
@@ -132,19 +245,22 @@ class TokenManager:
             # Create a temporary file first to avoid corruption if the process is interrupted
             temp_file = "{}.tmp".format(self.token_file)
             
-            # Save token data as JSON
+            # Save token data as compact JSON in a single write
             with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(token_data, f, indent=2)
+                f.write(json_codec.dumps(token_data))
             
             # Atomic rename to ensure the file is either fully written or not at all
             os.replace(temp_file, self.token_file)
             
-            # Save human-readable token info
-            with open(self.token_info_file, 'w', encoding='utf-8') as f:
-                f.write("Token Information:\n")
-                f.write("Created At: {}\n".format(token_data['created_at']))
-                f.write("Expires At: {}\n".format(token_data['expires_at']))
-                f.write("Token: {}...\n".format(token[:50]))
+            # Save human-readable token info only when asked to
+            if self.write_token_info:
+                with open(self.token_info_file, 'w', encoding='utf-8') as f:
+                    f.write(
+                        "Token Information:\n"
+                        "Created At: {}\n"
+                        "Expires At: {}\n"
+                        "Token: {}...\n".format(token_data['created_at'], token_data['expires_at'], token[:50])
+                    )
             
             logger.info("Token saved to cache")
         except (IOError, OSError) as e:
@@ -152,6 +268,8 @@ class TokenManager:
             
     def invalidate_token(self):
         """Invalidate the current token and force a new token to be fetched next time"""
+        self._token_available.clear()
+        self._token_state = None
         self.access_token = None
         self.token_expiry = None
         